@@ -8,34 +8,39 @@ import shutil
 
 from gideon.core.dedup import ImageDeduplicator
 from gideon.core.model import LLMMessageBuilder, Message
-from gideon.core.store import create_weaviate_client as create_client,  setup_collection
+from gideon.core.store import VertexEmbedder, VectorStore
 
 from gideon.analytics.logging import setup_logging
 
 from gideon.mechanisms.record import ScreenCapture
 from gideon.mechanisms.retrieve import query_collection
-from gideon.mechanisms.save import add_recordings
+from gideon.mechanisms.save import add_recordings, add_frame_recordings
 
 class GideonCapture:
-    def __init__(self, output_folder: str = "./temp_photo", fps: int = 20, dedup_interval: int = 5):
+    def __init__(self, output_folder: str = "./temp_photo", fps: int = 20, dedup_interval: int = 5,
+                 in_memory: bool = False):
         # Create output folder
         os.makedirs(output_folder, exist_ok=True)
-        
+
         # Initialize components
         self.output_folder = output_folder
         self.fps = fps
         self.dedup_interval = dedup_interval
+        self.in_memory = in_memory
         self.stop_event = Event()
-        
+
         # Initialize screen capture
-        self.screen_capture = ScreenCapture(output_folder, fps=fps)
+        self.screen_capture = ScreenCapture(output_folder, fps=fps, to_memory=in_memory)
         
         # Initialize deduplicator
         self.deduplicator = ImageDeduplicator(threshold=10)
-        
-        # Initialize vector DB
-        self.vector_client = create_client(self._setup_logging())
-        self.recordings = setup_collection(self.vector_client, self._setup_logging())
+
+        # Initialize logging once; every component shares the same logger
+        self.logger = self._setup_logging()
+
+        # Initialize the embedder and in-process vector store
+        self.embedder = VertexEmbedder(self.logger)
+        self.recordings = VectorStore(self.logger)
         
         # Initialize LLM interface
         self.llm_builder = LLMMessageBuilder()
@@ -47,7 +52,12 @@ class GideonCapture:
         """Setup logging configuration."""
         logger = logging.getLogger('gideon')
         logger.setLevel(logging.INFO)
-        
+
+        # Already configured: reuse it instead of opening another FD and
+        # duplicating every line through a second handler
+        if logger.handlers:
+            return logger
+
         # Create file handler with timestamp
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         handler = logging.FileHandler(f'gideon_{timestamp}.log')
@@ -64,23 +74,39 @@ class GideonCapture:
 
     def _dedup_and_update_db(self):
         """Background process for deduplication and vector DB updates."""
-        logger = self._setup_logging()
+        logger = self.logger
         
         while not self.stop_event.is_set():
             try:
                 # Wait for the specified interval
                 time.sleep(self.dedup_interval)
-                
+
+                if self.in_memory:
+                    # Frames never hit disk: drain the capture buffer, dedup
+                    # the arrays directly, and ingest the representatives
+                    frames = self.screen_capture.drain_frames()
+                    if frames:
+                        logger.info("Starting deduplication process...")
+                        representatives, _ = self.deduplicator.deduplicate_frames(frames, method='highest_res')
+
+                        if representatives:
+                            logger.info("Updating vector database...")
+                            add_frame_recordings(self.recordings, self.embedder, logger,
+                                                 [self.deduplicator.frames[key] for key in representatives])
+
+                    logger.info("Deduplication cycle completed")
+                    continue
+
                 # Run deduplication
                 logger.info("Starting deduplication process...")
                 representatives, _ = self.deduplicator.deduplicate(self.output_folder, method='highest_res')
-                
+
                 if representatives:
                     # logger.info(f"Found {len(representatives)} unique images")
                     
                     # Update vector DB with deduplicated images
                     logger.info("Updating vector database...")
-                    add_recordings(self.recordings, logger, list(representatives))
+                    add_recordings(self.recordings, self.embedder, logger, list(representatives))
                     
                     # Clean up processed images (SKIP FOR NOW)
                     logger.info("Cleaning up processed images...")
@@ -121,10 +147,6 @@ class GideonCapture:
         if self.dedup_thread and self.dedup_thread.is_alive():
             self.dedup_thread.join()
         
-        # Close vector DB client
-        if hasattr(self, 'vector_client'):
-            self.vector_client.close()
-        
         # Clean up output directory
         if os.path.exists(self.output_folder):
             shutil.rmtree(self.output_folder)
@@ -138,18 +160,15 @@ class GideonCapture:
             message = self.llm_builder.create_message("user")
             message.add_text(question)
             
-            # Get relevant images from vector DB
-            response = self.recordings.query.near_text(
-                query=question,
-                return_properties=['image_base64', 'timestamp'],  # Get base64 data instead of path
-                limit=3
-            )
-            
+            # Get relevant images from the in-process vector store
+            query_vector = self.embedder.embed_text(question)
+            results = self.recordings.search(query_vector, limit=3)
+
             # Add relevant images to the message using base64 data
-            for obj in response.objects:
+            for payload in results:
                 # The base64 data can be directly used in the message
-                message.add_image_base64(obj.properties['image_base64'])
-                print(f"Adding image from timestamp: {obj.properties['timestamp']}")
+                message.add_image_base64(payload['image_base64'])
+                print(f"Adding image from timestamp: {payload['timestamp']}")
             
             # Get response from LLM
             answer = self.llm_builder.send(max_tokens=500)
@@ -1,46 +1,187 @@
 from PIL import Image
 import numpy as np
+from scipy.fft import dctn
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import random
 from typing import Dict, List, Tuple, Set
 import os
 
+class _BKTree:
+    """BK-tree over integer hashes for Hamming-radius lookups."""
+
+    def __init__(self):
+        self.root = None  # (hash, index, {distance: child node})
+
+    def add(self, hash_value: int, index: int) -> None:
+        """Insert a hash with its associated index."""
+        if self.root is None:
+            self.root = (hash_value, index, {})
+            return
+        node = self.root
+        while True:
+            distance = (hash_value ^ node[0]).bit_count()
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (hash_value, index, {})
+                return
+            node = child
+
+    def search(self, hash_value: int, radius: int) -> List[int]:
+        """Return indices of all stored hashes within the Hamming radius."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = (hash_value ^ node[0]).bit_count()
+            if distance <= radius:
+                matches.append(node[1])
+            # Triangle inequality: only children within [d - r, d + r]
+            # can contain hashes inside the search radius
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return matches
+
+class _DisjointSet:
+    """Union-find with path compression for grouping hash indices."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        self.parent[self.find(a)] = self.find(b)
+
 class ImageDeduplicator:
-    def __init__(self, threshold: int = 10):
+    def __init__(self, threshold: int = 10, hash_method: str = 'phash'):
         """
         Initialize the deduplicator with a similarity threshold.
-        
+
         Args:
             threshold (int): Maximum hamming distance to consider images similar (default: 10)
+            hash_method (str): Perceptual hash to use ('phash' or 'dhash', default: 'phash')
         """
+        if hash_method not in ('dhash', 'phash'):
+            raise ValueError(f"Unknown hash method: {hash_method}")
         self.threshold = threshold
+        self.hash_method = hash_method
         self.image_hashes = {}  # Store image hashes
         self.groups = defaultdict(list)  # Store image groups
         self.representatives = set()  # Store representative images
+        self.frames = {}  # Store in-memory frames when deduplicating arrays
+        self._hash_cache = {}  # Cache hashes keyed by file identity
+        self._resolutions = {}  # Cache pixel counts recorded while hashing
         
-    def calculate_dhash(self, image_path: str, hash_size: int = 8) -> str:
-        """Calculate difference hash for an image."""
+    def _dhash_from_image(self, img: Image.Image, hash_size: int = 8) -> int:
+        """Calculate difference hash for an open image as a packed integer."""
+        # Convert to grayscale and resize
+        img = img.convert('L').resize((hash_size + 1, hash_size))
+        pixels = np.array(img)
+        diff = pixels[:, 1:] > pixels[:, :-1]
+        # Pack the 64 difference bits into a single integer so
+        # comparisons are one XOR + popcount instead of a char loop
+        bits = np.packbits(diff.flatten().astype(np.uint8))
+        return int.from_bytes(bits.tobytes(), 'big')
+
+    def _phash_from_image(self, img: Image.Image, hash_size: int = 8) -> int:
+        """Calculate DCT-based perceptual hash for an open image as a packed integer."""
+        # Convert to grayscale at 4x the hash size so the DCT has
+        # enough low-frequency content to work with
+        img = img.convert('L').resize((hash_size * 4, hash_size * 4))
+        pixels = np.array(img, dtype=np.float64)
+        dct = dctn(pixels, type=2, norm='ortho')
+        # Keep the top-left low-frequency block, dropping the DC term
+        # so overall brightness doesn't dominate the hash
+        low_freq = dct[:hash_size, :hash_size].flatten()[1:]
+        bits = low_freq > np.median(low_freq)
+        packed = np.packbits(bits.astype(np.uint8))
+        return int.from_bytes(packed.tobytes(), 'big')
+
+    def calculate_dhash(self, image_path: str, hash_size: int = 8) -> int:
+        """Calculate difference hash for an image as a packed integer."""
+        try:
+            with Image.open(image_path) as img:
+                self._resolutions[image_path] = img.size[0] * img.size[1]
+                # Let libjpeg decode grayscale at the nearest DCT scale
+                # instead of decoding the full-resolution image first
+                img.draft('L', (hash_size + 1, hash_size))
+                return self._dhash_from_image(img, hash_size)
+        except Exception as e:
+            print(f"Error processing {image_path}: {str(e)}")
+            return None
+
+    def calculate_phash(self, image_path: str, hash_size: int = 8) -> int:
+        """Calculate DCT-based perceptual hash for an image as a packed integer."""
         try:
             with Image.open(image_path) as img:
-                # Convert to grayscale and resize
-                img = img.convert('L').resize((hash_size + 1, hash_size))
-                pixels = np.array(img)
-                diff = pixels[:, 1:] > pixels[:, :-1]
-                return ''.join(str(int(d)) for d in diff.flatten())
+                self._resolutions[image_path] = img.size[0] * img.size[1]
+                # Let libjpeg decode grayscale at the nearest DCT scale
+                # instead of decoding the full-resolution image first
+                img.draft('L', (hash_size * 4, hash_size * 4))
+                return self._phash_from_image(img, hash_size)
         except Exception as e:
             print(f"Error processing {image_path}: {str(e)}")
             return None
 
-    def hamming_distance(self, hash1: str, hash2: str) -> int:
+    def hash_frame(self, frame: np.ndarray) -> int:
+        """Calculate the configured perceptual hash for an in-memory frame."""
+        try:
+            img = Image.fromarray(frame)
+            if self.hash_method == 'phash':
+                return self._phash_from_image(img)
+            return self._dhash_from_image(img)
+        except Exception as e:
+            print(f"Error hashing frame: {str(e)}")
+            return None
+
+    def calculate_hash(self, image_path: str) -> int:
+        """Calculate the configured perceptual hash for an image.
+
+        Results are cached by (inode, mtime, size) so files that survive
+        several dedup cycles only pay the decode + hash cost once: the stat
+        is a single syscall, while re-hashing means decoding the JPEG again.
+        """
+        try:
+            stat = os.stat(image_path)
+            cache_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            cache_key = None
+
+        if cache_key is not None and cache_key in self._hash_cache:
+            return self._hash_cache[cache_key]
+
+        if self.hash_method == 'phash':
+            hash_value = self.calculate_phash(image_path)
+        else:
+            hash_value = self.calculate_dhash(image_path)
+
+        if cache_key is not None and hash_value is not None:
+            self._hash_cache[cache_key] = hash_value
+        return hash_value
+
+    def hamming_distance(self, hash1: int, hash2: int) -> int:
         """Calculate hamming distance between two hashes."""
-        return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+        return (hash1 ^ hash2).bit_count()
 
     def get_image_resolution(self, image_path: str) -> int:
-        """Get total pixels in image."""
+        """Get total pixels in image, preferring the value recorded while hashing."""
+        if image_path in self._resolutions:
+            return self._resolutions[image_path]
         try:
             with Image.open(image_path) as img:
                 width, height = img.size
+                self._resolutions[image_path] = width * height
                 return width * height
         except Exception:
             return 0
@@ -48,37 +189,74 @@ class ImageDeduplicator:
     def process_directory(self, directory_path: str) -> None:
         """
         Process all images in a directory and calculate their hashes.
-        
+
+        Hashing is fanned out over a thread pool: PIL decode and the NumPy
+        DCT both release the GIL, so the per-image work runs concurrently.
+
         Args:
             directory_path (str): Path to directory containing images
         """
         valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
         self.image_hashes.clear()
-        
-        for path in Path(directory_path).rglob('*'):
-            if path.suffix.lower() in valid_extensions:
-                hash_value = self.calculate_dhash(str(path))
-                if hash_value:
-                    self.image_hashes[str(path)] = hash_value
+
+        paths = [str(path) for path in Path(directory_path).rglob('*')
+                 if path.suffix.lower() in valid_extensions]
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for path, hash_value in zip(paths, executor.map(self.calculate_hash, paths)):
+                if hash_value is not None:
+                    self.image_hashes[path] = hash_value
+
+    # Below this count the O(N^2) SIMD distance matrix beats the BK-tree;
+    # the matrix itself stays small (1024^2 bytes per buffer)
+    _VECTORIZED_MAX_IMAGES = 1024
+
+    def _union_similar_vectorized(self, hashes: List[int], disjoint_set: '_DisjointSet') -> None:
+        """Union all hash pairs within the threshold via a packed distance matrix."""
+        packed = np.array(hashes, dtype=np.uint64)
+        xor = packed[:, None] ^ packed[None, :]
+        if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0 emits SIMD popcount
+            distances = np.bitwise_count(xor)
+        else:
+            distances = np.unpackbits(xor[..., None].view(np.uint8), axis=-1).sum(axis=-1)
+        rows, cols = np.nonzero(np.triu(distances <= self.threshold, k=1))
+        for a, b in zip(rows.tolist(), cols.tolist()):
+            disjoint_set.union(a, b)
+
+    def _union_similar_bktree(self, hashes: List[int], disjoint_set: '_DisjointSet') -> None:
+        """Union hashes within the threshold via BK-tree radius queries."""
+        tree = _BKTree()
+        for index, hash_value in enumerate(hashes):
+            for neighbor in tree.search(hash_value, self.threshold):
+                disjoint_set.union(index, neighbor)
+            tree.add(hash_value, index)
 
     def group_similar_images(self) -> None:
-        """Group similar images based on hash similarity."""
+        """Group similar images based on hash similarity.
+
+        Small batches take a fully vectorized all-pairs XOR + popcount over a
+        bit-packed uint64 array; larger ones fall back to BK-tree lookups.
+        Either way, union-find components become the groups.
+        """
         self.groups.clear()
-        processed = set()
-        
-        for path1, hash1 in self.image_hashes.items():
-            if path1 in processed:
-                continue
-                
-            current_group = []
-            for path2, hash2 in self.image_hashes.items():
-                if path2 not in processed and self.hamming_distance(hash1, hash2) <= self.threshold:
-                    current_group.append(path2)
-                    processed.add(path2)
-                    
-            if current_group:
-                group_id = len(self.groups)
-                self.groups[group_id] = current_group
+
+        paths = list(self.image_hashes.keys())
+        hashes = list(self.image_hashes.values())
+
+        disjoint_set = _DisjointSet(len(paths))
+        if len(paths) <= self._VECTORIZED_MAX_IMAGES:
+            self._union_similar_vectorized(hashes, disjoint_set)
+        else:
+            self._union_similar_bktree(hashes, disjoint_set)
+
+        # Components of the union-find become the groups, keeping the
+        # original insertion order within and across groups
+        group_ids = {}
+        for index, path in enumerate(paths):
+            root = disjoint_set.find(index)
+            if root not in group_ids:
+                group_ids[root] = len(self.groups)
+            self.groups[group_ids[root]].append(path)
 
     def select_representatives(self, method: str = 'first') -> Set[str]:
         """
@@ -96,10 +274,18 @@ class ImageDeduplicator:
             if method == 'random':
                 representative = random.choice(group)
             elif method == 'highest_res':
-                representative = max(group, key=self.get_image_resolution)
+                # Pre-sort so ties resolve the same way every cycle; screen
+                # frames all share one resolution, so usually the whole
+                # max() scan can be skipped
+                group = sorted(group)
+                resolutions = [self.get_image_resolution(path) for path in group]
+                if len(set(resolutions)) == 1:
+                    representative = group[0]
+                else:
+                    representative = group[resolutions.index(max(resolutions))]
             else:  # 'first'
-                representative = group[0]
-                
+                representative = sorted(group)[0]
+
             self.representatives.add(representative)
             
         return self.representatives
@@ -143,14 +329,69 @@ class ImageDeduplicator:
                 return [path for path in group if path != representative]
         return []
 
-    def deduplicate(self, directory_path: str, method: str = 'first') -> Tuple[Set[str], Dict]:
+    # Above this many entries the identity/resolution caches are emptied:
+    # most of their keys belong to files already deleted after ingest
+    _CACHE_MAX_ENTRIES = 4096
+
+    def _release_cycle_state(self) -> None:
+        """Drop per-cycle grouping state so long sessions don't accumulate it."""
+        self.groups.clear()
+        self.image_hashes.clear()
+        if len(self._hash_cache) > self._CACHE_MAX_ENTRIES:
+            self._hash_cache.clear()
+        if len(self._resolutions) > self._CACHE_MAX_ENTRIES:
+            self._resolutions.clear()
+
+    def deduplicate_frames(self, frames: List[Tuple[float, np.ndarray]],
+                           method: str = 'first', release_groups: bool = True) -> Tuple[Set[str], Dict]:
+        """
+        Deduplicate in-memory frames without touching disk.
+
+        Frames are keyed as 'frame_<timestamp>' so the same grouping and
+        representative-selection machinery applies; the arrays for the
+        selected keys stay available on self.frames.
+
+        Args:
+            frames: List of (timestamp, image array) pairs
+            method (str): Method to select representatives
+            release_groups (bool): Free grouping state and dropped frames before returning
+
+        Returns:
+            Tuple of (representative frame keys, statistics)
+        """
+        self.image_hashes.clear()
+        self.frames = {}
+
+        for timestamp, frame in frames:
+            hash_value = self.hash_frame(frame)
+            if hash_value is None:
+                continue
+            key = f"frame_{timestamp:.3f}"
+            self.frames[key] = (timestamp, frame)
+            self.image_hashes[key] = hash_value
+            self._resolutions[key] = frame.shape[0] * frame.shape[1]
+
+        self.group_similar_images()
+        representatives = self.select_representatives(method)
+        statistics = self.get_group_statistics()
+        if release_groups:
+            # Keep only the representative frames alive; the duplicates are
+            # the bulk of the per-cycle memory
+            self.frames = {key: self.frames[key] for key in representatives}
+            self._release_cycle_state()
+        return representatives, statistics
+
+    def deduplicate(self, directory_path: str, method: str = 'first',
+                    release_groups: bool = True) -> Tuple[Set[str], Dict]:
         """
         Main method to perform deduplication.
-        
+
         Args:
             directory_path (str): Path to directory containing images
             method (str): Method to select representatives
-            
+            release_groups (bool): Free grouping state before returning (set
+                False to inspect groups via get_group_members afterwards)
+
         Returns:
             Tuple of (representative image paths, statistics)
         """
@@ -158,6 +399,8 @@ class ImageDeduplicator:
         self.group_similar_images()
         representatives = self.select_representatives(method)
         statistics = self.get_group_statistics()
+        if release_groups:
+            self._release_cycle_state()
         return representatives, statistics
 
 # Example usage:
@@ -167,7 +410,8 @@ if __name__ == "__main__":
     
     # Process directory
     image_dir = "/Users/balaji/gideon/temp_photo"
-    representatives, stats = dedup.deduplicate(image_dir, method='highest_res')
+    representatives, stats = dedup.deduplicate(image_dir, method='highest_res',
+                                               release_groups=False)
     
     # Print results
     print(f"\nFound {len(representatives)} unique images out of {stats['total_images']} total images")
@@ -1,65 +1,78 @@
-import warnings
 import time
-import argparse
-from datetime import datetime
-import logging
+import os
 
 from dotenv import load_dotenv
-import weaviate, os
-from weaviate.classes.config import Property, DataType, Configure, Multi2VecField
+import faiss
+import numpy as np
+import requests
 
-def create_weaviate_client(logger):
+_EMBED_URL = ("https://us-east1-aiplatform.googleapis.com/v1/projects/"
+              "spiritual-vent-433203-b2/locations/us-east1/publishers/google/"
+              "models/multimodalembedding@001:predict")
 
-    start_time = time.time()
+class VertexEmbedder:
+    """Thin client for the Vertex multimodal embedding model."""
 
-    try:
+    dimensions = 1408
+
+    def __init__(self, logger):
         load_dotenv()
-        vertex_key = os.getenv("VERTEX_APIKEY")
+        self.api_key = os.getenv("VERTEX_APIKEY")
+        self.logger = logger
 
-        client = weaviate.connect_to_embedded(
-            version="1.28.2",
-            environment_variables={
-                "ENABLE_MODULES": "multi2vec-google",
-                "LOG_LEVEL":"fatal"
-            },
-            headers={
-                "X-Goog-Vertex-Api-Key": vertex_key,
-            },
-            persistence_data_path='./vectordb/'
+    def _predict(self, instance: dict) -> np.ndarray:
+        response = requests.post(
+            _EMBED_URL,
+            json={"instances": [instance]},
+            headers={"x-goog-api-key": self.api_key},
         )
-        
-        logger.info(f"Client creation took {time.time() - start_time:.2f} seconds")
-        logger.info(f"Client Is Ready: {client.is_ready()}")
-        return client
-    except Exception as e:
-        logger.error(f"Error creating client: {str(e)}")
-        raise
+        response.raise_for_status()
+        prediction = response.json()["predictions"][0]
+        vector = prediction.get("imageEmbedding") or prediction.get("textEmbedding")
+        return np.asarray(vector, dtype=np.float32)
 
-def setup_collection(client, logger):
-    start_time = time.time()
-    
-    if(client.collections.exists("Recordings")):
-        logger.info("Deleting existing Recordings collection")
-        delete_start = time.time()
-        client.collections.delete("Recordings")
-        logger.info(f"Collection deletion took {time.time() - delete_start:.2f} seconds")
+    def embed_image(self, image_base64: str) -> np.ndarray:
+        """Embed a base64-encoded image."""
+        return self._predict({"image": {"bytesBase64Encoded": image_base64}})
 
-    logger.info("Creating new Recordings collection")
-    create_start = time.time()
-    client.collections.create(
-        name="Recordings",
-        vectorizer_config=Configure.Vectorizer.multi2vec_palm(
-            image_fields=["image"],
-            video_fields=["video"],
-            project_id="spiritual-vent-433203-b2",
-            location="us-east1",
-            model_id="multimodalembedding@001",
-            dimensions=1408,
-        )
-    )
-    logger.info(f"Collection creation took {time.time() - create_start:.2f} seconds")
-    
-    recordings = client.collections.get("Recordings")
-    logger.info(f"Total collection setup took {time.time() - start_time:.2f} seconds")
-    return recordings
+    def embed_text(self, text: str) -> np.ndarray:
+        """Embed a text query into the same space as the images."""
+        return self._predict({"text": text})
+
+class VectorStore:
+    """In-process FAISS index over image embeddings and their payloads.
+
+    Replaces the embedded Weaviate server: for a few thousand 1408-d vectors
+    a local HNSW lookup is millisecond-scale with no HTTP round-trip.
+    """
+
+    def __init__(self, logger, dimensions: int = VertexEmbedder.dimensions):
+        start_time = time.time()
+        # fp16 scalar quantization halves the resident size of the index;
+        # cosine similarity is insensitive to the dropped mantissa bits, and
+        # at this scale (thousands of vectors) the exact scan stays ms-level
+        self.index = faiss.IndexScalarQuantizer(
+            dimensions, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        self.payloads = []
+        self.logger = logger
+        logger.info(f"Index creation took {time.time() - start_time:.2f} seconds")
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def add(self, vector: np.ndarray, payload: dict) -> None:
+        """Add a vector with its associated payload to the index."""
+        row = np.ascontiguousarray(vector, dtype=np.float32).reshape(1, -1)
+        # Normalize so inner product equals cosine similarity
+        faiss.normalize_L2(row)
+        self.index.add(row)
+        self.payloads.append(payload)
 
+    def search(self, vector: np.ndarray, limit: int = 3) -> list[dict]:
+        """Return the payloads of the nearest vectors to the query."""
+        if not self.payloads:
+            return []
+        query = np.ascontiguousarray(vector, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(query)
+        _, indices = self.index.search(query, min(limit, len(self.payloads)))
+        return [self.payloads[i] for i in indices[0] if i != -1]
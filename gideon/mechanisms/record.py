@@ -1,24 +1,189 @@
 import time
 import os
+import platform
+import shutil
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 import subprocess
-from threading import Event, Thread
+from threading import Event, Thread, Lock
 import signal
-from queue import Queue
 import mss
 import cv2
 import numpy as np
 
+try:
+    # libjpeg-turbo's SIMD DCT encodes several times faster than the
+    # libjpeg build inside cv2, and it takes BGRA input directly
+    from turbojpeg import TurboJPEG, TJPF_BGRA
+    _turbojpeg = TurboJPEG()
+except Exception:
+    _turbojpeg = None
+
+# Record layout of a packed capture file: little-endian float64 timestamp
+# and uint32 JPEG length, followed by the JPEG bytes
+_PACK_HEADER = struct.Struct('<dI')
+
+def _encode_frame_jpeg(frame, quality=95):
+    """Encode a BGRA frame as JPEG bytes, or None on failure.
+
+    Module-level so it can run on a process pool as well as a thread pool.
+    """
+    if _turbojpeg is not None:
+        return _turbojpeg.encode(frame, quality=quality,
+                                 pixel_format=TJPF_BGRA)
+    # Slicing off alpha gives BGR without a full cvtColor pass;
+    # imencode wants contiguous data so compact the slice
+    bgr = np.ascontiguousarray(frame[:, :, :3])
+    ok, encoded = cv2.imencode('.jpg', bgr,
+                               [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
+
+def read_packed_frames(path):
+    """Yield (timestamp, jpeg_bytes) records from a packed capture file."""
+    with open(path, 'rb') as f:
+        while header := f.read(_PACK_HEADER.size):
+            if len(header) < _PACK_HEADER.size:
+                break
+            timestamp, length = _PACK_HEADER.unpack(header)
+            buf = f.read(length)
+            if len(buf) < length:
+                break
+            yield timestamp, buf
+
+def _encode_and_write_frame(frame, filepath, quality=95):
+    """Encode a BGRA frame as JPEG and write it to disk."""
+    try:
+        buf = _encode_frame_jpeg(frame, quality)
+        if buf is None:
+            print(f"Error encoding frame for {filepath}")
+            return
+        fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, buf)
+            # These JPEGs are never read back by this process; telling the
+            # kernel to drop their pages keeps thousands of frames from
+            # evicting the rest of the working set (fadvise is best-effort,
+            # so dirty pages not yet written back simply stay cached)
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except Exception as e:
+        print(f"Error saving frame: {e}")
+
+def _select_video_encoder():
+    """Pick a hardware H.264 encoder when one is likely present."""
+    if platform.system() == 'Darwin':
+        return 'h264_videotoolbox'
+    if shutil.which('nvidia-smi'):
+        return 'h264_nvenc'
+    return 'libx264'
+
+class _FrameRing:
+    """Preallocated single-producer/single-consumer ring of frame slots.
+
+    The producer only advances head and the consumer only advances tail, and
+    plain int updates are atomic under the GIL, so neither side takes a lock.
+    Slots are allocated once from the first frame's shape and reused, so the
+    steady state does no per-frame allocation.
+    """
+
+    def __init__(self, capacity=30):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.timestamps = [0.0] * capacity
+        self.head = 0  # next slot the producer writes
+        self.tail = 0  # next slot the consumer reads
+        self.data_ready = Event()
+
+    def put(self, frame, timestamp):
+        """Copy a frame into the next free slot; returns False when full."""
+        if self.head - self.tail >= self.capacity:
+            return False
+        index = self.head % self.capacity
+        slot = self.slots[index]
+        if slot is None or slot.shape != frame.shape:
+            self.slots[index] = np.array(frame)
+        else:
+            np.copyto(slot, frame)
+        self.timestamps[index] = timestamp
+        self.head += 1
+        self.data_ready.set()
+        return True
+
+    def get(self, timeout=None):
+        """Return (frame, timestamp) for the next slot, or None on timeout.
+
+        The returned frame aliases the slot: call advance() once done with
+        it, and copy it first if it has to outlive that.
+        """
+        if self.tail >= self.head:
+            self.data_ready.clear()
+            self.data_ready.wait(timeout)
+            if self.tail >= self.head:
+                return None
+        index = self.tail % self.capacity
+        return self.slots[index], self.timestamps[index]
+
+    def advance(self):
+        """Release the slot returned by the last get() back to the producer."""
+        self.tail += 1
+
+    def empty(self):
+        return self.tail >= self.head
+
 class ScreenCapture:
-    def __init__(self, output_folder, fps=20):
+    def __init__(self, output_folder, fps=20, to_memory=False, memory_buffer_size=600,
+                 motion_threshold=1.0, video_output=False, encode_processes=False,
+                 packed_output=False):
         self.output_folder = output_folder
         self.fps = fps
         self.frame_interval = 1.0 / fps
         self.stop_event = Event()
-        self.frame_queue = Queue(maxsize=30)
+        self.frame_ring = _FrameRing(capacity=30)
         self.start_time = None
         self.capture_thread = None
         self.save_thread = None
+
+        # In-memory mode: keep frames in a bounded ring instead of writing
+        # JPEGs to disk, so consumers avoid the encode/decode round-trip
+        self.to_memory = to_memory
+        self.frame_buffer = deque(maxlen=memory_buffer_size)
+        self.buffer_lock = Lock()
+
+        # Mean per-pixel change on a 16x16 thumbnail below which a frame is
+        # considered identical to the last kept one and dropped outright;
+        # set to 0 to keep every frame
+        self.motion_threshold = motion_threshold
+        self._last_thumb = None
+
+        # Workers for JPEG encoding; threads are the default since cv2
+        # releases the GIL during encode, but encode_processes=True fans out
+        # to worker processes for hosts where the encode threads still
+        # contend with the rest of the pipeline
+        if encode_processes:
+            self.encode_pool = ProcessPoolExecutor(max_workers=max(1, os.cpu_count() // 2))
+        else:
+            self.encode_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count()))
+
+        # Video mode: stream raw frames into one long-lived ffmpeg process
+        # (hardware encoder where available) instead of per-frame JPEGs
+        self.video_output = video_output
+        self.video_path = os.path.join(output_folder, 'capture.mp4')
+        self.ffmpeg_proc = None
+        self.timestamp_file = None
+
+        # Packed mode: append length-prefixed JPEG records to one file
+        # (read back with read_packed_frames) so a long session costs one
+        # inode and sequential writes instead of tens of thousands of
+        # tiny files. Off by default since the dedup/ingest path consumes
+        # per-frame JPEGs.
+        self.packed_output = packed_output
+        self.pack_path = os.path.join(output_folder, 'capture.pak')
+        self.pack_file = None
+        self.pack_lock = Lock()
         
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
@@ -46,53 +211,165 @@ class ScreenCapture:
             
             if self.save_thread and self.save_thread.is_alive():
                 print("Waiting for save thread to finish...")
-                # Add remaining frames to queue
-                while not self.frame_queue.empty():
-                    self.frame_queue.get()
                 self.save_thread.join()
-            
+
+            # Flush any in-flight encodes before tearing down
+            self.encode_pool.shutdown(wait=True)
+            self._stop_video_encoder()
+
+            # Callbacks have all fired once the pool is drained
+            if self.pack_file is not None:
+                self.pack_file.close()
+                self.pack_file = None
+
             if hasattr(self, 'sct'):
                 self.sct.close()
             print("Capture stopped successfully")
     
+    def _frame_has_motion(self, frame):
+        """Check a 16x16 thumbnail against the last kept frame's thumbnail.
+
+        A cheap L1 diff on 256 pixels filters out the static-screen case
+        before the frame costs a JPEG encode, a hash, and a DB insert.
+        """
+        thumb = cv2.resize(frame, (16, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+        if self._last_thumb is None:
+            self._last_thumb = thumb
+            return True
+        if np.abs(thumb - self._last_thumb).mean() < self.motion_threshold:
+            return False
+        self._last_thumb = thumb
+        return True
+
     def capture_screen(self):
-        """Capture screen at specified intervals"""
-        last_capture = 0
-        
+        """Capture screen on an absolute-deadline schedule"""
+        next_deadline = time.perf_counter()
+
         while not self.stop_event.is_set():
-            current_time = time.perf_counter()
-            if current_time - last_capture >= self.frame_interval:
-                try:
-                    screenshot = self.sct.grab(self.monitor)
-                    frame = np.array(screenshot)
-                    rel_timestamp = time.perf_counter() - self.start_time
-                    
-                    if not self.frame_queue.full():
-                        self.frame_queue.put((frame, rel_timestamp))
-                    
-                    last_capture = current_time
-                except Exception as e:
-                    print(f"Error capturing frame: {e}")
-                    continue
+            try:
+                screenshot = self.sct.grab(self.monitor)
+                # Zero-copy view over mss's internal buffer; np.array()
+                # would allocate and copy the full frame every grab
+                frame = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(
+                    screenshot.height, screenshot.width, 4)
+                rel_timestamp = time.perf_counter() - self.start_time
+
+                # The ffmpeg pipe is constant-rate rawvideo, so video mode
+                # must get every grabbed frame: thinning static stretches
+                # would compress the timeline and desync the timestamp
+                # sidecar. The JPEG/memory paths keep the motion filter.
+                if self.video_output or self._frame_has_motion(frame):
+                    # put() copies the view into a reused slot; a full
+                    # ring drops the frame, same as the old queue
+                    self.frame_ring.put(frame, rel_timestamp)
+            except Exception as e:
+                print(f"Error capturing frame: {e}")
+
+            # Advance by absolute deadlines so one slow grab doesn't shift
+            # every later frame, and block the whole remainder in a single
+            # interruptible wait instead of half-interval polling wakeups
+            next_deadline += self.frame_interval
+            now = time.perf_counter()
+            if next_deadline <= now:
+                # Fell behind: skip the missed slots rather than bursting
+                next_deadline = now + self.frame_interval
             else:
-                time.sleep(max(0, (self.frame_interval - (current_time - last_capture)) / 2))
+                self.stop_event.wait(next_deadline - now)
     
+    def _start_video_encoder(self, height, width):
+        """Spawn the long-lived ffmpeg process consuming raw BGRA frames."""
+        codec = _select_video_encoder()
+        command = [
+            'ffmpeg', '-y',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgra',
+            '-s', f'{width}x{height}',
+            '-r', str(self.fps),
+            '-i', 'pipe:',
+            '-c:v', codec,
+        ]
+        if codec == 'h264_nvenc':
+            command += ['-preset', 'p1', '-rc', 'vbr', '-b:v', '0']
+        elif codec == 'h264_videotoolbox':
+            command += ['-allow_sw', '1']
+        else:  # software fallback
+            command += ['-preset', 'ultrafast', '-crf', '22']
+        command += ['-pix_fmt', 'yuv420p', self.video_path]
+
+        self.ffmpeg_proc = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                            stdout=subprocess.DEVNULL,
+                                            stderr=subprocess.DEVNULL)
+        # Frame timestamps can't live in filenames anymore; keep a sidecar
+        self.timestamp_file = open(os.path.join(self.output_folder, 'capture_timestamps.csv'), 'w')
+
+    def _stop_video_encoder(self):
+        """Close the encoder's stdin and wait for the trailer to be written."""
+        if self.ffmpeg_proc is not None:
+            self.ffmpeg_proc.stdin.close()
+            self.ffmpeg_proc.wait()
+            self.ffmpeg_proc = None
+        if self.timestamp_file is not None:
+            self.timestamp_file.close()
+            self.timestamp_file = None
+
+    def _append_packed(self, timestamp, future):
+        """Append one encoded frame to the packed capture file."""
+        try:
+            buf = future.result()
+            if buf is None:
+                return
+            with self.pack_lock:
+                self.pack_file.write(_PACK_HEADER.pack(timestamp, len(buf)))
+                self.pack_file.write(buf)
+        except Exception as e:
+            print(f"Error packing frame: {e}")
+
+    def drain_frames(self):
+        """Return and clear all buffered in-memory frames as (timestamp, array) pairs"""
+        with self.buffer_lock:
+            frames = list(self.frame_buffer)
+            self.frame_buffer.clear()
+        return frames
+
     def save_frames(self):
-        """Save frames from queue to disk"""
-        while not (self.stop_event.is_set() and self.frame_queue.empty()):
-            try:
-                frame, timestamp = self.frame_queue.get(timeout=1)
-                filename = f"frame_{timestamp:.3f}.jpg"
-                filepath = os.path.join(self.output_folder, filename)
-                
-                cv2.imwrite(filepath, cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR),
-                           [cv2.IMWRITE_JPEG_QUALITY, 95])
-                
-            except Queue.Empty:
+        """Save frames from the ring to disk (or to the in-memory buffer)"""
+        while not (self.stop_event.is_set() and self.frame_ring.empty()):
+            item = self.frame_ring.get(timeout=1)
+            if item is None:
                 continue
+            frame, timestamp = item
+            try:
+                if self.to_memory:
+                    # RGB so PIL consumers can encode/hash without a swap
+                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
+                    with self.buffer_lock:
+                        self.frame_buffer.append((timestamp, rgb))
+                elif self.video_output:
+                    # rawvideo input consumes BGRA directly, no conversion
+                    if self.ffmpeg_proc is None:
+                        self._start_video_encoder(frame.shape[0], frame.shape[1])
+                    self.ffmpeg_proc.stdin.write(frame.tobytes())
+                    self.timestamp_file.write(f"{timestamp:.3f}\n")
+                elif self.packed_output:
+                    if self.pack_file is None:
+                        self.pack_file = open(self.pack_path, 'wb', buffering=1 << 20)
+                    # Encode on the pool, append from the completion
+                    # callback; the lock serializes records since futures
+                    # can finish out of submission order
+                    future = self.encode_pool.submit(_encode_frame_jpeg, frame.copy())
+                    future.add_done_callback(
+                        lambda fut, ts=timestamp: self._append_packed(ts, fut))
+                else:
+                    filename = f"frame_{timestamp:.3f}.jpg"
+                    filepath = os.path.join(self.output_folder, filename)
+
+                    # The slot gets reused once advanced, so the encode
+                    # worker needs its own copy
+                    self.encode_pool.submit(_encode_and_write_frame, frame.copy(), filepath)
             except Exception as e:
-                if not isinstance(e, TimeoutError):
-                    print(f"Error saving frame: {e}")
+                print(f"Error saving frame: {e}")
+            finally:
+                self.frame_ring.advance()
     
     def start_capture(self):
         """Start the capture process using multiple threads"""
@@ -1,30 +1,19 @@
 import time
-from gideon.utils.shared import json_print, display_media
+from gideon.utils.shared import json_print
 
-def query_collection(client, logger):
+def query_collection(store, embedder, logger, query: str = "jupyter notebook", limit: int = 2):
     start_time = time.time()
-    
-    recordings = client.collections.get("Recordings")
-    
-    # Aggregate
-    agg_start = time.time()
-    agg = recordings.aggregate.over_all(group_by="mediaType")
-    logger.info(f"Aggregation took {time.time() - agg_start:.2f} seconds")
-    
-    for group in agg.groups:
-        logger.info(f"Aggregate group: {group}")
+
+    logger.info(f"Index contains {len(store)} objects")
 
     # Query
     query_start = time.time()
-    response = recordings.query.near_text(
-        query="jupyter notebook",
-        return_properties=['name','path','mediaType'],
-        limit=2
-    )
+    vector = embedder.embed_text(query)
+    results = store.search(vector, limit=limit)
     logger.info(f"Query execution took {time.time() - query_start:.2f} seconds")
 
-    for obj in response.objects:
-        json_print(obj.properties)
-        display_media(obj.properties)
+    for payload in results:
+        # Skip the blob when printing; the metadata is what's readable
+        json_print({key: value for key, value in payload.items() if key != 'image_base64'})
 
     logger.info(f"Total query operations took {time.time() - start_time:.2f} seconds")
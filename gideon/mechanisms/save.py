@@ -1,41 +1,83 @@
 import time
-from gideon.utils.shared import toBase64
+from concurrent.futures import ThreadPoolExecutor
+from gideon.utils.shared import toBase64, frame_to_base64
 import os
 
-def add_recordings(recordings, logger, source: list[str]):
-    """Modified to store base64 images instead of paths"""
+def _remove_files(paths: list[str], logger):
+    """Unlink files in parallel so the syscalls overlap instead of serializing."""
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"Error removing {path}: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(remove, paths))
+
+def add_recordings(store, embedder, logger, source: list[str]):
+    """Embed images and add them to the in-process vector store"""
     start_time = time.time()
-    
-    # Get all jpg files in directory
-    # image_dir = "/Users/balaji/gideon/temp_photo"
-    # source = [name for name in os.listdir(image_dir) if name.lower().endswith('.jpg')]
+
     logger.info(f"Found {len(source)} JPG files to process")
 
-    with recordings.batch.fixed_size(batch_size=2, concurrent_requests=2) as batch:
-        for idx, path in enumerate(source, 1):
-            file_start = time.time()
-            logger.info(f"Processing file {idx}/{len(source)}: {path}")
-            # path = os.path.join(image_dir, name)
-            
-            # Convert image to base64
+    def encode_and_embed(path):
+        try:
             image_base64 = toBase64(path)
-            
-            batch.add_object({
+            return path, image_base64, embedder.embed_image(image_base64)
+        except Exception as e:
+            logger.error(f"Failed to embed {path}: {str(e)}")
+            return path, None, None
+
+    processed_paths = []
+    # Encode and embed on a thread pool so file reads and the Vertex round
+    # trips overlap; index insertion itself stays on this thread since
+    # faiss writes aren't thread-safe
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count())) as pool:
+        for idx, (path, image_base64, vector) in enumerate(pool.map(encode_and_embed, source), 1):
+            if vector is None:
+                continue
+            logger.info(f"Processing file {idx}/{len(source)}: {path}")
+
+            store.add(vector, {
                 "name": path,
-                "image_base64": image_base64,  # Store base64 instead of path
-                "image": image_base64,  # This is still needed for vectorization
+                "image_base64": image_base64,
                 "mediaType": "image",
                 "timestamp": float(path.split('/')[-1].split('_')[1].split('.')[0])  # Extract timestamp from filename
             })
-            
-            # Delete the file after adding to batch
-            os.remove(path)
-            
-            logger.info(f"File {path} processing took {time.time() - file_start:.2f} seconds")
-
-    if len(recordings.batch.failed_objects) > 0:
-        logger.error(f"Failed to import {len(recordings.batch.failed_objects)} objects")
-        for failed in recordings.batch.failed_objects:
-            logger.error(f"Failed to import object with error: {failed.message}")
-    else:
-        logger.info("No errors in batch processing")
\ No newline at end of file
+
+            # Defer deletion so ingest isn't stalled on unlinks, and failed
+            # embeds keep their files for the next cycle's retry
+            processed_paths.append(path)
+
+    _remove_files(processed_paths, logger)
+
+    logger.info(f"Ingest of {len(processed_paths)} files took {time.time() - start_time:.2f} seconds")
+
+def add_frame_recordings(store, embedder, logger, frames: list[tuple[float, "object"]]):
+    """Embed in-memory frames and add them to the store without a disk round-trip"""
+    start_time = time.time()
+
+    logger.info(f"Found {len(frames)} in-memory frames to process")
+
+    def encode_and_embed(item):
+        timestamp, frame = item
+        try:
+            image_base64 = frame_to_base64(frame)
+            return timestamp, image_base64, embedder.embed_image(image_base64)
+        except Exception as e:
+            logger.error(f"Failed to embed frame at {timestamp:.3f}: {str(e)}")
+            return timestamp, None, None
+
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count())) as pool:
+        for timestamp, image_base64, vector in pool.map(encode_and_embed, frames):
+            if vector is None:
+                continue
+
+            store.add(vector, {
+                "name": f"frame_{timestamp:.3f}",
+                "image_base64": image_base64,
+                "mediaType": "image",
+                "timestamp": float(timestamp)
+            })
+
+    logger.info(f"Frame ingest took {time.time() - start_time:.2f} seconds")
@@ -1,5 +1,7 @@
+import io
 import json
 import base64
+import mmap
 import requests
 from PIL import Image
 import os
@@ -8,8 +10,25 @@ import platform
 
 # Helper function to convert a file to base64 representation
 def toBase64(path):
+    # mmap the file so b64encode reads the page cache directly instead of
+    # first materializing the whole file as a bytes object
     with open(path, 'rb') as file:
-        return base64.b64encode(file.read()).decode('utf-8')
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return base64.b64encode(mapped).decode('ascii')
+
+def frame_to_base64(frame):
+    """
+    Encode an in-memory RGB image array as JPEG and return its base64 string.
+
+    Args:
+        frame: Image array (H x W x 3, RGB)
+
+    Returns:
+        str: Base64 encoded JPEG of the frame
+    """
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format='JPEG', quality=95)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
 
 def json_print(data):
     """Pretty print JSON data with proper indentation."""
@@ -8,7 +8,8 @@ import shutil
 
 from record_photo import ScreenCapture
 from dedup import ImageDeduplicator
-from store_photo import create_client, setup_collection, add_recordings
+from ingest_common import WeaviateSession, setup_collection
+from store_photo import add_recordings
 from model import LLMMessageBuilder, Message
 
 class GideonCapture:
@@ -29,8 +30,10 @@ class GideonCapture:
         self.deduplicator = ImageDeduplicator(threshold=10)
         
         # Initialize vector DB
-        self.vector_client = create_client(self._setup_logging())
-        self.recordings = setup_collection(self.vector_client, self._setup_logging())
+        logger = self._setup_logging()
+        self.vector_session = WeaviateSession(logger)
+        self.vector_client = self.vector_session.connect()
+        self.recordings = setup_collection(self.vector_client, logger)
         
         # Initialize LLM interface
         self.llm_builder = LLMMessageBuilder()
@@ -117,8 +120,8 @@ class GideonCapture:
             self.dedup_thread.join()
         
         # Close vector DB client
-        if hasattr(self, 'vector_client'):
-            self.vector_client.close()
+        if hasattr(self, 'vector_session'):
+            self.vector_session.close()
         
         # Clean up output directory
         if os.path.exists(self.output_folder):
@@ -136,14 +139,14 @@ class GideonCapture:
             # Get relevant images from vector DB
             response = self.recordings.query.near_text(
                 query=question,
-                return_properties=['image_base64', 'timestamp'],  # Get base64 data instead of path
+                return_properties=['image', 'timestamp'],  # Get base64 data instead of path
                 limit=3
             )
-            
+
             # Add relevant images to the message using base64 data
             for obj in response.objects:
                 # The base64 data can be directly used in the message
-                message.add_image_base64(obj.properties['image_base64'])
+                message.add_image_base64(obj.properties['image'])
                 print(f"Adding image from timestamp: {obj.properties['timestamp']}")
             
             # Get response from LLM
@@ -19,22 +19,25 @@ class ImageDeduplicator:
         self.groups = defaultdict(list)  # Store image groups
         self.representatives = set()  # Store representative images
         
-    def calculate_dhash(self, image_path: str, hash_size: int = 8) -> str:
-        """Calculate difference hash for an image."""
+    def calculate_dhash(self, image_path: str, hash_size: int = 8) -> int:
+        """Calculate difference hash for an image as a packed integer."""
         try:
             with Image.open(image_path) as img:
                 # Convert to grayscale and resize
                 img = img.convert('L').resize((hash_size + 1, hash_size))
                 pixels = np.array(img)
                 diff = pixels[:, 1:] > pixels[:, :-1]
-                return ''.join(str(int(d)) for d in diff.flatten())
+                # Pack the 64 difference bits into a single integer so
+                # comparisons are one XOR + popcount instead of a char loop
+                bits = np.packbits(diff.flatten().astype(np.uint8))
+                return int.from_bytes(bits.tobytes(), 'big')
         except Exception as e:
             print(f"Error processing {image_path}: {str(e)}")
             return None
 
-    def hamming_distance(self, hash1: str, hash2: str) -> int:
+    def hamming_distance(self, hash1: int, hash2: int) -> int:
         """Calculate hamming distance between two hashes."""
-        return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+        return (hash1 ^ hash2).bit_count()
 
     def get_image_resolution(self, image_path: str) -> int:
         """Get total pixels in image."""
@@ -58,7 +61,7 @@ class ImageDeduplicator:
         for path in Path(directory_path).rglob('*'):
             if path.suffix.lower() in valid_extensions:
                 hash_value = self.calculate_dhash(str(path))
-                if hash_value:
+                if hash_value is not None:
                     self.image_hashes[str(path)] = hash_value
 
     def group_similar_images(self) -> None:
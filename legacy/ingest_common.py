@@ -0,0 +1,148 @@
+import time
+import logging
+from datetime import datetime
+
+from dotenv import load_dotenv
+import weaviate, os
+from weaviate.classes.config import Configure
+
+from utils import json_print, display_media
+
+def setup_logging():
+    # Create a logger
+    logger = logging.getLogger('weaviate_operations')
+    logger.setLevel(logging.INFO)
+
+    # The logger is a process-wide singleton: photo and video runs chained
+    # in one process would otherwise stack handlers and double every line
+    if logger.handlers:
+        return logger
+
+    # Create file handler with timestamp in filename
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    fh = logging.FileHandler(f'weaviate_execution_{timestamp}.log')
+    fh.setLevel(logging.INFO)
+
+    # Create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    fh.setFormatter(formatter)
+
+    # Add handler to logger
+    logger.addHandler(fh)
+
+    return logger
+
+def setup_collection(client, logger, reset=False):
+    start_time = time.time()
+
+    if(client.collections.exists("Recordings")):
+        if not reset:
+            # Keep the indexed vectors: recreating the collection forces a
+            # full re-embedding of everything already ingested
+            logger.info("Reusing existing Recordings collection")
+            return client.collections.get("Recordings")
+        logger.info("Deleting existing Recordings collection")
+        delete_start = time.time()
+        client.collections.delete("Recordings")
+        logger.info(f"Collection deletion took {time.time() - delete_start:.2f} seconds")
+
+    logger.info("Creating new Recordings collection")
+    create_start = time.time()
+    client.collections.create(
+        name="Recordings",
+        vectorizer_config=Configure.Vectorizer.multi2vec_palm(
+            image_fields=["image"],
+            video_fields=["video"],
+            project_id="spiritual-vent-433203-b2",
+            location="us-east1",
+            model_id="multimodalembedding@001",
+            dimensions=1408,
+        )
+    )
+    logger.info(f"Collection creation took {time.time() - create_start:.2f} seconds")
+
+    recordings = client.collections.get("Recordings")
+    logger.info(f"Total collection setup took {time.time() - start_time:.2f} seconds")
+    return recordings
+
+def query_collection(client, logger, query="jupyter notebook", limit=2):
+    start_time = time.time()
+
+    recordings = client.collections.get("Recordings")
+
+    # Aggregate
+    agg_start = time.time()
+    agg = recordings.aggregate.over_all(group_by="mediaType")
+    logger.info(f"Aggregation took {time.time() - agg_start:.2f} seconds")
+
+    for group in agg.groups:
+        logger.info(f"Aggregate group: {group}")
+
+    # Query
+    query_start = time.time()
+    response = recordings.query.near_text(
+        query=query,
+        return_properties=['name','path','mediaType'],
+        limit=limit
+    )
+    logger.info(f"Query execution took {time.time() - query_start:.2f} seconds")
+
+    for obj in response.objects:
+        json_print(obj.properties)
+        display_media(obj.properties)
+
+    logger.info(f"Total query operations took {time.time() - start_time:.2f} seconds")
+
+class WeaviateSession:
+    """Context manager owning one embedded Weaviate connection.
+
+    Spawning the embedded server costs seconds (port bind, data path open,
+    schema load), so a script opens one session and shares it across setup,
+    ingestion, and queries — and photo + video runs chained in one process
+    reuse the same client instead of cold-starting a second server.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.client = None
+
+    def connect(self):
+        if self.client is not None:
+            return self.client
+
+        start_time = time.time()
+        try:
+            load_dotenv()
+            vertex_key = os.getenv("VERTEX_APIKEY")
+
+            self.client = weaviate.connect_to_embedded(
+                version="1.28.2",
+                environment_variables={
+                    "ENABLE_MODULES": "multi2vec-google",
+                    "LOG_LEVEL": "fatal"
+                },
+                headers={
+                    "X-Goog-Vertex-Api-Key": vertex_key,
+                },
+                persistence_data_path='./vectordb/'
+            )
+
+            self.logger.info(f"Client creation took {time.time() - start_time:.2f} seconds")
+            self.logger.info(f"Client Is Ready: {self.client.is_ready()}")
+            return self.client
+        except Exception as e:
+            self.logger.error(f"Error creating client: {str(e)}")
+            raise
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.logger.info("Client connection closed")
+            self.client = None
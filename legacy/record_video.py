@@ -1,67 +1,86 @@
 import time
 import os
-from datetime import datetime, timedelta
+import platform
+import shutil
 import subprocess
 from threading import Event
 import signal
 
+def _select_encoder_args():
+    """Pick codec arguments for the best available H.264 encoder.
+
+    The fixed-function blocks (videotoolbox, nvenc, amf) free the CPU that
+    libx264 ultrafast would otherwise burn at 1080p30.
+    """
+    if platform.system() == 'Darwin':
+        return ['-c:v', 'h264_videotoolbox', '-q:v', '50', '-allow_sw', '1',
+                '-pix_fmt', 'yuv420p']
+    if shutil.which('nvidia-smi'):
+        # nvenc takes nv12 natively, skipping a conversion inside ffmpeg
+        return ['-c:v', 'h264_nvenc', '-preset', 'p1', '-tune', 'll',
+                '-rc', 'vbr', '-cq', '22', '-b:v', '0', '-pix_fmt', 'nv12']
+    if shutil.which('rocm-smi'):
+        return ['-c:v', 'h264_amf', '-quality', 'speed', '-pix_fmt', 'yuv420p']
+    # Software fallback
+    return ['-c:v', 'h264', '-preset', 'ultrafast', '-crf', '22',
+            '-pix_fmt', 'yuv420p']
+
 class ScreenRecorder:
     def __init__(self, output_folder, chunk_duration=5, fps=30):
         self.output_folder = output_folder
         self.chunk_duration = chunk_duration
         self.fps = fps
         self.stop_event = Event()
-        
+        self.process = None
+
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
-        
+
         # Handle Ctrl+C gracefully
         signal.signal(signal.SIGINT, self.signal_handler)
-        
+
     def signal_handler(self, signum, frame):
         print("\nStopping recording...")
         self.stop_event.set()
-    
-    def record_chunk(self, start_time):
-        """Record a single chunk using ffmpeg screen capture"""
-        end_time = start_time + timedelta(seconds=self.chunk_duration)
-        filename = f"{start_time.strftime('%Y-%m-%d_%H-%M-%S')};;{end_time.strftime('%Y-%m-%d_%H-%M-%S')}.mp4"
-        filepath = os.path.join(self.output_folder, filename)
-        
+        if self.process is not None and self.process.poll() is None:
+            # SIGINT lets ffmpeg write the current segment's trailer
+            self.process.send_signal(signal.SIGINT)
+
+    def start_recording(self):
+        """Record continuously, letting ffmpeg's segment muxer cut the chunks.
+
+        One long-lived ffmpeg process replaces the old spawn-per-chunk loop,
+        so chunk boundaries are a mux operation instead of a full capture
+        device + encoder re-initialization with a visible gap.
+        """
+        print("Recording will start in 3 seconds...")
+        time.sleep(3)  # Give time to switch windows if needed
+
+        output_pattern = os.path.join(self.output_folder, '%Y-%m-%d_%H-%M-%S.mp4')
         command = [
             'ffmpeg',
             '-f', 'avfoundation',  # macOS screen capture
             '-capture_cursor', '1',  # Capture cursor
+            '-framerate', str(self.fps),  # Frame rate
             '-i', "1:none",  # Capture main screen, no audio
-            '-t', str(self.chunk_duration),  # Duration
-            '-r', str(self.fps),  # Frame rate
-            '-preset', 'ultrafast',
-            '-c:v', 'h264',
-            '-crf', '22',  # Good quality
-            '-pix_fmt', 'yuv420p',
-            filepath
+            *_select_encoder_args(),
+            '-f', 'segment',
+            '-segment_time', str(self.chunk_duration),
+            '-segment_format', 'mp4',
+            '-reset_timestamps', '1',
+            '-strftime', '1',  # Segment filenames carry their start time
+            output_pattern
         ]
-        
-        try:
-            process = subprocess.run(command, 
-                                   capture_output=True,
-                                   timeout=self.chunk_duration + 2)  # Allow 2s buffer
-            if process.returncode == 0:
-                print(f"Completed chunk: {filename}")
-            else:
-                print(f"Error recording chunk: {process.stderr.decode()}")
-        except subprocess.TimeoutExpired:
-            print(f"Chunk timed out: {filename}")
-    
-    def start_recording(self):
-        """Start the recording process"""
-        print("Recording will start in 3 seconds...")
-        time.sleep(3)  # Give time to switch windows if needed
-        
+
         try:
-            while not self.stop_event.is_set():
-                chunk_start_time = datetime.now()
-                self.record_chunk(chunk_start_time)
+            # Own session so the terminal's Ctrl+C doesn't reach ffmpeg
+            # directly: it must see exactly one SIGINT (the forwarded one)
+            # to finish the current segment's trailer — a second makes it
+            # hard-exit mid-write
+            self.process = subprocess.Popen(command, start_new_session=True)
+            while self.process.poll() is None and not self.stop_event.is_set():
+                time.sleep(0.5)
+            self.process.wait()
         finally:
             print("Recording stopped")
 
@@ -1,5 +1,6 @@
 import json
 import base64
+import io
 import requests
 from PIL import Image
 import os
@@ -8,8 +9,28 @@ import platform
 
 # Helper function to convert a file to base64 representation
 def toBase64(path):
+    # Encode in 57 KiB chunks (a multiple of 3 bytes keeps the base64
+    # output aligned) so peak memory is one chunk plus the output instead
+    # of three full copies of a multi-MB video
+    chunk_size = 57 * 1024
+    encoded = bytearray()
     with open(path, 'rb') as file:
-        return base64.b64encode(file.read()).decode('utf-8')
+        while chunk := file.read(chunk_size):
+            encoded += base64.b64encode(chunk)
+    return encoded.decode('ascii')
+
+# Downscale an image and re-encode it before base64, shrinking the
+# embedding payload. The embedding model resizes internally anyway, so
+# shipping a full-resolution screenshot only costs encode CPU and upload
+# bandwidth for no semantic gain.
+def image_to_base64_resized(path, max_edge=640, quality=85):
+    with Image.open(path) as img:
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
 
 def json_print(data):
     """Pretty print JSON data with proper indentation."""
@@ -81,16 +102,15 @@ def url_to_base64(url):
 def file_to_base64(path):
     """
     Convert a local file to base64 representation.
-    
+
     Args:
         path (str): Path to the local file
-    
+
     Returns:
         str: Base64 encoded string of the file
     """
     try:
-        with open(path, 'rb') as file:
-            return base64.b64encode(file.read()).decode('utf-8')
+        return toBase64(path)
     except Exception as e:
         print(f"Error converting file to base64: {e}")
         return None